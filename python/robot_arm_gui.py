@@ -3,13 +3,23 @@
 
 from __future__ import annotations
 
+import glob
 import json
 import os
-import queue
+import re
+import select
+import selectors
+import sys
+import threading
+import time
 import tkinter as tk
+from collections import deque
+from contextlib import contextmanager
 from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
 from tkinter import filedialog, messagebox, ttk
-from typing import Callable, Dict, List, Optional
+from typing import Callable, ClassVar, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
 try:
     import serial
@@ -23,12 +33,22 @@ except ImportError:  # pragma: no cover - optional dependency
     Image = None  # type: ignore
     ImageTk = None  # type: ignore
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover - optional dependency
+    ujson = None  # type: ignore
+
 
 # =============================================================================
 # Styling helpers
 # =============================================================================
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Palette:
     """Centralised colour palette for the dark themed interface."""
 
@@ -43,127 +63,146 @@ class Palette:
     text_muted: str = "#adb5bd"
 
 
+def _tcl_word(value: object) -> str:
+    """Quote ``value`` as one Tcl word; sequences become Tcl lists."""
+    if isinstance(value, (tuple, list)):
+        return "{" + " ".join(_tcl_word(item) for item in value) + "}"
+    return "{" + str(value) + "}"
+
+
 class DarkTheme:
     """Apply a consistent dark theme to ttk widgets."""
 
     def __init__(self, root: tk.Tk, palette: Palette | None = None) -> None:
         self.palette = palette or Palette()
+        # ttk styles are shared by every window of one Tcl interpreter, so
+        # re-theming a Toplevel with the palette its Tk root already uses is
+        # a no-op worth skipping. The palette is recorded on that root.
+        tk_root = root._root()
+        if getattr(tk_root, "_dark_theme_palette", None) == self.palette:
+            return
         self._style = ttk.Style(root)
         self._apply()
+        tk_root._dark_theme_palette = self.palette  # type: ignore[attr-defined]
 
     def _apply(self) -> None:
         palette = self.palette
         style = self._style
-
-        style.theme_use("clam")
-        style.configure("TFrame", background=palette.background)
-        style.configure("Card.TFrame", background=palette.surface, relief="flat")
-        style.configure("Accent.TFrame", background=palette.surface_alt, relief="flat")
-
-        style.configure(
-            "TLabel",
-            background=palette.background,
-            foreground=palette.text,
-        )
-        style.configure(
-            "Heading.TLabel",
-            font=("Segoe UI", 10, "bold"),
-            background=palette.background,
-            foreground=palette.text,
-        )
-        style.configure(
-            "Muted.TLabel",
-            background=palette.background,
-            foreground=palette.text_muted,
-        )
-
-        style.configure(
-            "TButton",
-            background=palette.surface_alt,
-            foreground=palette.text,
-            borderwidth=0,
-            focuscolor=palette.accent,
-            padding=(10, 6),
-        )
-        style.map(
-            "TButton",
-            background=[("active", palette.accent_hover), ("pressed", palette.accent)],
-            foreground=[("disabled", palette.text_muted)],
-        )
-
-        style.configure(
-            "Accent.TButton",
-            background=palette.accent,
-            foreground=palette.background,
-            padding=(10, 6),
-            font=("Segoe UI", 10, "bold"),
-        )
-        style.map(
-            "Accent.TButton",
-            background=[("active", palette.accent_hover), ("pressed", palette.accent)],
-        )
-
-        style.configure(
-            "Toggle.TButton",
-            background=palette.surface,
-            foreground=palette.text,
-            padding=(6, 3),
-        )
+        # Resolve each colour once instead of an attribute lookup per option.
+        bg, surface, surface_alt = palette.background, palette.surface, palette.surface_alt
+        accent, accent_hover = palette.accent, palette.accent_hover
+        text, text_muted = palette.text, palette.text_muted
 
         entry_fields = {
-            "foreground": palette.text,
-            "fieldbackground": palette.surface,
-            "background": palette.surface,
-            "insertcolor": palette.text,
-            "bordercolor": palette.surface_alt,
-            "lightcolor": palette.surface_alt,
+            "foreground": text,
+            "fieldbackground": surface,
+            "background": surface,
+            "insertcolor": text,
+            "bordercolor": surface_alt,
+            "lightcolor": surface_alt,
+        }
+        configs: Dict[str, Dict[str, object]] = {
+            "TFrame": {"background": bg},
+            "Card.TFrame": {"background": surface, "relief": "flat"},
+            "Accent.TFrame": {"background": surface_alt, "relief": "flat"},
+            "TLabel": {
+                "background": bg,
+                "foreground": text,
+            },
+            "Heading.TLabel": {
+                "font": ("Segoe UI", 10, "bold"),
+                "background": bg,
+                "foreground": text,
+            },
+            "Muted.TLabel": {
+                "background": bg,
+                "foreground": text_muted,
+            },
+            "TCheckbutton": {
+                "background": bg,
+                "foreground": text,
+            },
+            "TButton": {
+                "background": surface_alt,
+                "foreground": text,
+                "borderwidth": 0,
+                "focuscolor": accent,
+                "padding": (10, 6),
+            },
+            "Accent.TButton": {
+                "background": accent,
+                "foreground": bg,
+                "padding": (10, 6),
+                "font": ("Segoe UI", 10, "bold"),
+            },
+            "Toggle.TButton": {
+                "background": surface,
+                "foreground": text,
+                "padding": (6, 3),
+            },
+            "TEntry": entry_fields,
+            "TCombobox": entry_fields,
+            "Spinbox": entry_fields,
+            "TSpinbox": entry_fields,
+            "Horizontal.TScale": {
+                "background": bg,
+                "troughcolor": surface,
+                "sliderlength": 18,
+            },
+            "Dark.Treeview": {
+                "background": surface,
+                "fieldbackground": surface,
+                "foreground": text,
+                "borderwidth": 0,
+                "rowheight": 26,
+            },
+            "Dark.Treeview.Heading": {
+                "background": surface_alt,
+                "foreground": text,
+                "font": ("Segoe UI", 10, "bold"),
+                "borderwidth": 0,
+            },
+            "Card.TLabelframe": {
+                "background": surface,
+                "foreground": text,
+                "borderwidth": 1,
+                "relief": "solid",
+            },
+            "Card.TLabelframe.Label": {
+                "background": surface,
+                "foreground": text,
+                "font": ("Segoe UI", 10, "bold"),
+            },
+            "Status.TLabel": {"background": surface_alt, "foreground": text_muted},
+        }
+        maps: Dict[str, Dict[str, List[tuple]]] = {
+            "TButton": {
+                "background": [("active", accent_hover), ("pressed", accent)],
+                "foreground": [("disabled", text_muted)],
+            },
+            "Accent.TButton": {
+                "background": [("active", accent_hover), ("pressed", accent)],
+            },
+            "Dark.Treeview": {
+                "background": [("selected", accent)],
+                "foreground": [("selected", bg)],
+            },
         }
-        for widget in ("TEntry", "TCombobox", "Spinbox", "TSpinbox"):
-            style.configure(widget, **entry_fields)
-
-        style.configure(
-            "Horizontal.TScale",
-            background=palette.background,
-            troughcolor=palette.surface,
-            sliderlength=18,
-        )
-
-        style.configure(
-            "Dark.Treeview",
-            background=palette.surface,
-            fieldbackground=palette.surface,
-            foreground=palette.text,
-            borderwidth=0,
-            rowheight=26,
-        )
-        style.configure(
-            "Dark.Treeview.Heading",
-            background=palette.surface_alt,
-            foreground=palette.text,
-            font=("Segoe UI", 10, "bold"),
-            borderwidth=0,
-        )
-        style.map(
-            "Dark.Treeview",
-            background=[("selected", palette.accent)],
-            foreground=[("selected", palette.background)],
-        )
 
-        style.configure(
-            "Card.TLabelframe",
-            background=palette.surface,
-            foreground=palette.text,
-            borderwidth=1,
-            relief="solid",
-        )
-        style.configure(
-            "Card.TLabelframe.Label",
-            background=palette.surface,
-            foreground=palette.text,
-            font=("Segoe UI", 10, "bold"),
-        )
+        # One Tcl script instead of a Python->Tcl round trip per style.
+        script = []
+        for name, options in configs.items():
+            words = " ".join(f"-{key} {_tcl_word(value)}" for key, value in options.items())
+            script.append(f"ttk::style configure {name} {words}")
+        for name, options in maps.items():
+            words = " ".join(
+                f"-{key} " + _tcl_word([word for *states, value in specs for word in (" ".join(states), value)])
+                for key, specs in options.items()
+            )
+            script.append(f"ttk::style map {name} {words}")
 
-        style.configure("Status.TLabel", background=palette.surface_alt, foreground=palette.text_muted)
+        style.theme_use("clam")
+        style.tk.eval("\n".join(script))
 
 
 # =============================================================================
@@ -171,120 +210,565 @@ class DarkTheme:
 # =============================================================================
 
 
-class SerialManager:
-    """Minimal abstraction for asynchronous serial communications."""
+def _call_now(callback: Callable[..., object], *args: object) -> None:
+    callback(*args)
+
 
-    def __init__(self, on_line_callback: Optional[Callable[[str], None]] = None) -> None:
+class SerialManager:
+    """Serial link serviced by a background I/O thread.
+
+    The thread owns every read and write on the port so a slow device never
+    blocks the GUI: writes are queued and return at once, received lines are
+    collected in an inbox that :meth:`poll` drains from the Tk loop.
+    """
+
+    # Above this many complete lines per poll, hand them over as one batch.
+    BATCH_THRESHOLD = 16
+    # Longest time the I/O thread waits on the port before re-checking state.
+    IO_TIMEOUT = 0.1
+    # Port enumeration walks sysfs/udev or the registry: reuse it briefly.
+    PORTS_TTL = 1.0
+    # Inside a batch, hand the payload over early once it grows this large.
+    MAX_BATCH_BYTES = 4096
+    # Upper bound on how long a closed port keeps writing queued data.
+    DRAIN_TIMEOUT_MAX = 60.0
+    # close() waits this long on the caller's thread; the rest is left to
+    # the I/O thread, which then releases the port itself.
+    CLOSE_WAIT = 0.5
+
+    def __init__(
+        self,
+        on_line_callback: Optional[Callable[[str], None]] = None,
+        dispatch: Callable[..., object] = _call_now,
+        log_callback: Optional[Callable[[str], None]] = None,
+    ) -> None:
         self.ser: Optional[serial.Serial] = None  # type: ignore[attr-defined]
         self.on_line_callback = on_line_callback
-        self.read_queue: queue.Queue[str] = queue.Queue()
+        self.log_callback = log_callback
+        # ``dispatch(func, *args)`` schedules a call, e.g. ``Tk.after_idle``.
+        self.dispatch = dispatch
         self.running = False
-        self.buffer = ""
+        # Set by close(): the I/O thread exits once the outbox is empty or
+        # ``_drain_deadline`` has passed.
+        self._draining = False
+        self._drain_deadline = 0.0
+        # Thread still draining a closed port, and messages it left for poll().
+        self._closing: Optional[threading.Thread] = None
+        self._notices: Deque[str] = deque()
+        # Bytes handed to the I/O thread / actually written since open().
+        self.bytes_queued = 0
+        self.bytes_written = 0
+        self.buffer = bytearray()
+        # Both deques are only swapped or extended while holding ``_lock``.
+        self._lock = threading.Lock()
+        self._inbox: Deque[str] = deque()
+        self._outbox: Deque[bytes] = deque()
+        # Writes held back by batch(); only touched from the GUI thread.
+        self._batch_buf = bytearray()
+        self._batch_depth = 0
+        self._thread: Optional[threading.Thread] = None
+        # Raw port descriptor for the write fast path (POSIX only).
+        self._fd = -1
+        # Self-pipe used to wake the I/O thread out of select() (POSIX only).
+        self._wake_r = -1
+        self._wake_w = -1
+        # Pipe the I/O thread writes to when the inbox fills (POSIX only),
+        # so the GUI event loop can watch it instead of polling.
+        self._notify_r = -1
+        self._notify_w = -1
+        self._ports_cache: Optional[Tuple[float, List[str]]] = None
 
     def list_ports(self) -> List[str]:
         if not serial:  # pragma: no cover - optional dependency
             return []
-        return [p.device for p in serial.tools.list_ports.comports()]
+        now = time.monotonic()
+        if self._ports_cache and now - self._ports_cache[0] < self.PORTS_TTL:
+            return self._ports_cache[1]
+        ports: List[str] = []
+        if sys.platform.startswith("linux"):
+            # USB adapters and Arduinos show up here; skip the slow scanner.
+            ports = sorted(glob.glob("/dev/ttyUSB*") + glob.glob("/dev/ttyACM*"))
+        if not ports:
+            ports = [p.device for p in serial.tools.list_ports.comports()]
+        self._ports_cache = (now, ports)
+        return ports
+
+    def invalidate_ports(self) -> None:
+        """Forget the cached port list so the next lookup rescans."""
+        self._ports_cache = None
 
     def open(self, port: str, baud: int = 115200) -> None:
         if not serial:  # pragma: no cover - optional dependency
             raise RuntimeError("pyserial n'est pas installé")
         self.close()
-        self.ser = serial.Serial(port, baudrate=baud, timeout=0.05)  # type: ignore[attr-defined]
+        if self.is_closing():
+            raise RuntimeError("le port précédent termine son envoi, réessayer dans un instant")
+        self.bytes_queued = self.bytes_written = 0
+        if os.name == "posix":
+            # The thread waits in select() and reads only what is pending.
+            self.ser = serial.Serial(port, baudrate=baud, timeout=0)  # type: ignore[attr-defined]
+            self._fd = self.ser.fileno()
+            self._wake_r, self._wake_w = os.pipe()
+            os.set_blocking(self._wake_w, False)
+            self._notify_r, self._notify_w = os.pipe()
+            os.set_blocking(self._notify_r, False)
+            os.set_blocking(self._notify_w, False)
+        else:  # pragma: no cover - platform specific
+            # COM handles cannot be selected: fall back to a timed read.
+            self.ser = serial.Serial(port, baudrate=baud, timeout=self.IO_TIMEOUT)  # type: ignore[attr-defined]
         self.running = True
+        self._thread = threading.Thread(target=self._io_loop, args=(self.ser,), name="serial-io", daemon=True)
+        self._thread.start()
 
     def close(self) -> None:
-        self.running = False
-        if self.ser and self.ser.is_open:
-            try:
-                self.ser.close()
-            except Exception:
-                pass
+        """Stop using the port without waiting for queued writes.
+
+        The I/O thread keeps writing what is already queued, for at most the
+        time those bytes need on the wire, then closes the port itself.
+        Bytes it had to drop are reported through ``log_callback``.
+        """
+        thread, self._thread = self._thread, None
+        self._batch_buf.clear()
+        if thread is None:
+            return
+        self._drain_deadline = time.monotonic() + self._drain_timeout()
+        self._draining = True
+        self._wake()
+        # New writes are dropped from here on.
         self.ser = None
+        self._closing = thread
+        thread.join(timeout=self.CLOSE_WAIT)
+
+    def is_closing(self) -> bool:
+        """True while a closed port is still writing out queued data."""
+        return self._closing is not None and self._closing.is_alive()
+
+    def wait_closed(self) -> None:
+        """Block until a closed port has finished draining (e.g. on exit)."""
+        if self._closing is not None:
+            self._closing.join()
 
     def send_line(self, line: str) -> None:
+        self.send_lines((line,))
+
+    def send_lines(self, lines: Iterable[str]) -> None:
+        """Send several lines through a single ``write`` call."""
         if not self.ser:
             return
-        if not line.endswith("\n"):
-            line += "\n"
+        payload = bytearray()
+        for line in lines:
+            payload += line.encode("utf-8")
+            if not line.endswith("\n"):
+                payload += b"\n"
+        self.send_bytes(payload)
+
+    def send_bytes(self, data: bytes) -> None:
+        """Queue an already encoded, newline terminated payload."""
+        if not self.ser:
+            return
+        if self._batch_depth:
+            self._batch_buf += data
+            if len(self._batch_buf) >= self.MAX_BATCH_BYTES:
+                self._submit_batch()
+            return
+        with self._lock:
+            self._outbox.append(bytes(data))
+            self.bytes_queued += len(data)
+        self._wake()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group every write made inside the block into a single one."""
+        self._batch_depth += 1
         try:
-            self.ser.write(line.encode("utf-8"))
-        except Exception:
-            pass
+            yield
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._submit_batch()
+
+    def _submit_batch(self) -> None:
+        data = bytes(self._batch_buf)
+        self._batch_buf.clear()
+        if data and self.ser:
+            with self._lock:
+                self._outbox.append(data)
+                self.bytes_queued += len(data)
+            self._wake()
+
+    def _drain_timeout(self) -> float:
+        # Time the pending bytes need on the wire (10 bits each), plus slack.
+        baud = getattr(self.ser, "baudrate", 0) or 115200
+        pending = self.bytes_queued - self.bytes_written
+        return min(self.DRAIN_TIMEOUT_MAX, 1.0 + pending * 10 / baud)
+
+    def notify_fileno(self) -> int:
+        """Return a descriptor that turns readable when lines arrive, or -1."""
+        return self._notify_r
+
+    def poll(self) -> bool:
+        """Dispatch the lines received since the previous call (Tk thread).
+
+        Returns True when there was something to dispatch.
+        """
+        while self._notices:
+            message = self._notices.popleft()
+            if self.log_callback:
+                self.dispatch(self.log_callback, message)
+        if self._thread is None:
+            return False
+        if self._notify_r >= 0:
+            # Drain before swapping so a notification for lines queued after
+            # the swap is never lost.
+            try:
+                os.read(self._notify_r, 512)
+            except OSError:
+                pass
+        if not self._inbox:
+            return False
+        with self._lock:
+            lines, self._inbox = self._inbox, deque()
+        if not self.on_line_callback:
+            return False
+        if len(lines) >= self.BATCH_THRESHOLD:
+            self.dispatch(self._flush_batch, list(lines))
+        else:
+            for line in lines:
+                self.dispatch(self.on_line_callback, line)
+        return True
+
+    def _flush_batch(self, lines: List[str]) -> None:
+        if self.on_line_callback:
+            for line in lines:
+                self.on_line_callback(line)
+
+    # ------------------------------------------------------- I/O thread ---
 
-    def poll(self) -> None:
-        if self.ser and self.running:
+    def _wake(self) -> None:
+        if self._wake_w >= 0:
             try:
-                data = self.ser.read(1024)
-                if data:
-                    self.buffer += data.decode("utf-8", errors="ignore")
-                    while "\n" in self.buffer:
-                        line, self.buffer = self.buffer.split("\n", 1)
-                        line = line.strip()
-                        if self.on_line_callback:
-                            self.on_line_callback(line)
+                os.write(self._wake_w, b"\0")
+            except OSError:
+                pass  # pipe full: the thread already has a wake-up pending
+        elif self.ser is not None:  # pragma: no cover - platform specific
+            # No pipe to select on: cut the timed read short so queued
+            # writes go out now instead of after IO_TIMEOUT.
+            try:
+                self.ser.cancel_read()
             except Exception:
                 pass
 
+    def _io_loop(self, ser: serial.Serial) -> None:  # type: ignore[attr-defined]
+        selector = None
+        if self._wake_r >= 0:
+            selector = selectors.DefaultSelector()
+            selector.register(ser.fileno(), selectors.EVENT_READ)
+            selector.register(self._wake_r, selectors.EVENT_READ)
+        try:
+            while self.running:
+                try:
+                    self._write_pending(ser)
+                    if self._draining and (not self._outbox or self._drain_expired()):
+                        break
+                    if selector is not None:
+                        data = b""
+                        for key, _ in selector.select(self.IO_TIMEOUT):
+                            if key.fd == self._wake_r:
+                                os.read(self._wake_r, 512)
+                            else:
+                                data = self._read_available()
+                    else:  # pragma: no cover - platform specific
+                        data = ser.read(max(1, ser.in_waiting))
+                    if data and not self._draining:
+                        self._feed(data)
+                except Exception:
+                    if not self.running:
+                        break
+                    time.sleep(self.IO_TIMEOUT)
+        finally:
+            if selector is not None:
+                selector.close()
+            self._release(ser)
+
+    def _drain_expired(self) -> bool:
+        return self._draining and time.monotonic() >= self._drain_deadline
+
+    def _release(self, ser: serial.Serial) -> None:  # type: ignore[attr-defined]
+        # Runs last on the I/O thread: nothing else uses the port or pipes.
+        try:
+            ser.close()
+        except Exception:
+            pass
+        lost = self.bytes_queued - self.bytes_written
+        if lost > 0:
+            self._notices.append(f"Port fermé avant la fin de l'envoi : {lost} octets perdus")
+        self.running = False
+        self._draining = False
+        self._fd = -1
+        fds = (self._wake_r, self._wake_w, self._notify_r, self._notify_w)
+        self._wake_r = self._wake_w = -1
+        self._notify_r = self._notify_w = -1
+        for fd in fds:
+            if fd >= 0:
+                os.close(fd)
+        self.buffer.clear()
+        with self._lock:
+            self._inbox.clear()
+            self._outbox.clear()
+
+    def _read_available(self) -> bytes:
+        # One read() drains everything the driver holds; no in_waiting ioctl.
+        try:
+            data = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return b""
+        if not data:
+            raise OSError("le port série ne renvoie plus de données")
+        return data
+
+    def _write_pending(self, ser: serial.Serial) -> None:  # type: ignore[attr-defined]
+        if not self._outbox:
+            return
+        with self._lock:
+            chunks, self._outbox = self._outbox, deque()
+        data = b"".join(chunks)
+        if self._fd < 0:  # pragma: no cover - platform specific
+            ser.write(data)
+            self.bytes_written += len(data)
+            return
+        # Only this thread writes, so pyserial's wrapper and lock are not
+        # needed; the fd is non-blocking, so wait for room when it is full.
+        view = memoryview(data)
+        while view and self.running and not self._drain_expired():
+            try:
+                written = os.write(self._fd, view)
+            except BlockingIOError:
+                select.select([], [self._fd], [], self.IO_TIMEOUT)
+                continue
+            view = view[written:]
+            self.bytes_written += written
+
+    def _feed(self, data: bytes) -> None:
+        # Accumulate raw bytes and decode complete lines only, so a burst
+        # costs one pass instead of re-copying a growing str.
+        buffer = self.buffer
+        buffer += data
+        lines = []
+        start = 0
+        while True:
+            end = buffer.find(b"\n", start)
+            if end < 0:
+                break
+            lines.append(buffer[start:end].decode("utf-8", errors="ignore").strip())
+            start = end + 1
+        del buffer[:start]
+        if lines:
+            with self._lock:
+                was_empty = not self._inbox
+                self._inbox.extend(lines)
+            if was_empty and self._notify_w >= 0:
+                try:
+                    os.write(self._notify_w, b"\0")
+                except OSError:
+                    pass
+
+
+# =============================================================================
+# G-code payloads
+# =============================================================================
+
+# Pre-encoded G-code used on the playback path, so no str is built and
+# re-encoded for every line.
+_M279 = b"M279\n"
+_M278 = b"M278\n"
+_M400 = b"M400\n"
+_M280_PREFIX = (b"M280 P0 S", b"M280 P1 S", b"M280 P2 S")
+_SERVO_KEYS = ("servo0", "servo1", "servo2")
+_G4_TMPL = b"G4 P%d\n"
+# Decimal spellings of every servo angle and speed, looked up instead of
+# converting the same small ints over and over.
+_ANGLE_STR = [b"%d" % value for value in range(181)]
+_SPEED_STR = [b"%d" % value for value in range(256)]
+
+
+def _digits(table: List[bytes], value: object) -> bytes:
+    if type(value) is int and 0 <= value < len(table):
+        return table[value]
+    # Same text as formatting the value into the command: "90" stays "90".
+    return str(value).encode("utf-8")
+
+
+def compile_step(step: Dict[str, object], rest_angle: int = 90) -> bytes:
+    """Return the complete G-code payload for one timeline step.
+
+    The payload ends with M400 so the firmware answers a single ``ok`` once
+    the whole step has been executed.
+    """
+    speed = _digits(_SPEED_STR, step.get("speed", 60))
+    buf = bytearray(_M279)
+    for prefix, key in zip(_M280_PREFIX, _SERVO_KEYS):
+        buf += prefix
+        buf += _digits(_ANGLE_STR, step.get(key, rest_angle))
+        buf += b" V"
+        buf += speed
+        buf += b"\n"
+    buf += _M278
+
+    pause = step.get("pause", 0)
+    if pause and isinstance(pause, (int, float)) and pause > 0:
+        buf += _G4_TMPL % pause
+
+    nano_cmd = str(step.get("nano_cmd", "")).strip()
+    if nano_cmd:
+        buf += nano_cmd.encode("utf-8")
+        buf += b"\n"
+
+    buf += _M400
+    return bytes(buf)
+
 
 # =============================================================================
 # Timeline handling
 # =============================================================================
 
 
+def _json_dumps(obj: object, pretty: bool = True) -> bytes:
+    """Serialise ``obj`` to UTF-8 JSON with orjson, ujson or the stdlib."""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if ujson:
+        text = ujson.dumps(obj, indent=2 if pretty else 0, ensure_ascii=False, escape_forward_slashes=False)
+        return text.encode("utf-8")
+    # Non-ASCII step names are written as UTF-8, like orjson does, rather
+    # than as \uXXXX escapes.
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _json_loads(data: bytes | str) -> object:
+    if orjson:
+        return orjson.loads(data)
+    if ujson:
+        return ujson.loads(data)
+    return json.loads(data)
+
+
 class TimelineManager:
+    # Larger timelines are saved as compact JSON unless asked otherwise.
+    PRETTY_MAX_STEPS = 1000
+
     def __init__(self) -> None:
         self.steps: List[Dict[str, object]] = []
         self.loop_count = 1
+        self._compiled: List[bytes] = []
+        self._compiled_from: Optional[tuple] = None
+
+    def compile(self, rest_angle: int = 90) -> List[bytes]:
+        """Return one G-code payload per step, reusing the last result.
+
+        The cache is checked against a copy of the steps, so in-place edits of
+        ``self.steps`` are picked up.
+        """
+        if self._compiled_from != (rest_angle, self.steps):
+            self._compiled = [compile_step(step, rest_angle) for step in self.steps]
+            self._compiled_from = (rest_angle, [dict(step) for step in self.steps])
+        return self._compiled
 
     def add_step(self, step: Dict[str, object]) -> None:
         self.steps.append(step)
 
+    def rows(self) -> List[tuple]:
+        """Return the (name, servo0, servo1, servo2, pause, nano_cmd) of each step."""
+        return [
+            (
+                step.get("name", f"Step {idx + 1}"),
+                step.get("servo0", 90),
+                step.get("servo1", 90),
+                step.get("servo2", 90),
+                step.get("pause", 0),
+                step.get("nano_cmd", ""),
+            )
+            for idx, step in enumerate(self.steps)
+        ]
+
     def clear(self) -> None:
         self.steps.clear()
 
     def to_json(self) -> str:
-        return json.dumps(self.steps, indent=2)
+        return _json_dumps(self.steps).decode("utf-8")
 
     def from_json_str(self, data: str) -> None:
-        self.steps = json.loads(data)
+        self.steps = _json_loads(data)  # type: ignore[assignment]
 
-    def save_to_file(self, path: str) -> None:
-        with open(path, "w", encoding="utf-8") as handle:
-            json.dump(self.steps, handle, indent=2)
+    def save_to_file(self, path: str, pretty: Optional[bool] = None) -> None:
+        if pretty is None:
+            pretty = len(self.steps) <= self.PRETTY_MAX_STEPS
+        Path(path).write_bytes(_json_dumps(self.steps, pretty))
 
     def load_from_file(self, path: str) -> None:
-        with open(path, "r", encoding="utf-8") as handle:
-            self.steps = json.load(handle)
+        self.steps = _json_loads(Path(path).read_bytes())  # type: ignore[assignment]
 
 
 # =============================================================================
 # Arm control logic
 # =============================================================================
 
+# ``str.endswith`` with a tuple avoids lowercasing every received line.
+_OK_SUFFIXES = ("ok", "OK", "Ok", "oK")
+
+
+def _noop(_msg: str) -> None:
+    pass
+
 
 class ArmController:
     def __init__(self, serial_mgr: SerialManager, log_callback: Optional[Callable[[str], None]] = None) -> None:
         self.serial = serial_mgr
-        self.log = log_callback or (lambda msg: None)
+        self.log = log_callback or _noop
         self.playing = False
         self.current_sequence: List[Dict[str, object]] = []
+        self.compiled_sequence: List[bytes] = []
         self.current_step_idx = 0
         self.waiting_for_ok = False
         self.rest_angle = 90
+        # When False, the ">> ..." echo of every sent G-code line is skipped.
+        self.verbose = True
         self.on_sequence_finished: Optional[Callable[[], None]] = None
         self.loop_total = 1
         self.loop_remaining = 1
 
     def send(self, line: str) -> None:
-        self.log(f">> {line}")
+        if self.verbose:
+            self.log(f">> {line}")
         self.serial.send_line(line)
 
-    def play_sequence(self, steps: List[Dict[str, object]], loops: int = 1, on_finished: Optional[Callable[[], None]] = None) -> None:
+    def send_many(self, lines: Iterable[str]) -> None:
+        """Send several commands with a single serial write."""
+        with self.serial.batch():
+            for line in lines:
+                self.send(line)
+
+    def send_bytes(self, payload: bytes) -> None:
+        if self.verbose and self.log is not _noop:
+            self.log(">> " + payload.decode("utf-8", errors="replace").rstrip("\n").replace("\n", " | "))
+        self.serial.send_bytes(payload)
+
+    def play_sequence(
+        self,
+        steps: List[Dict[str, object]],
+        loops: int = 1,
+        on_finished: Optional[Callable[[], None]] = None,
+        compiled: Optional[List[bytes]] = None,
+    ) -> None:
         if not steps:
             return
+        if compiled is None:
+            compiled = [compile_step(step, self.rest_angle) for step in steps]
         self.playing = True
-        self.current_sequence = steps
+        # Snapshot the steps so they stay aligned with the compiled payloads.
+        self.current_sequence = list(steps)
+        self.compiled_sequence = compiled
         self.current_step_idx = 0
         self.waiting_for_ok = False
         self.loop_total = max(1, loops)
@@ -309,34 +793,16 @@ class ArmController:
                 self.goto_rest()
                 return
 
-        step = self.current_sequence[self.current_step_idx]
+        idx = self.current_step_idx
         self.current_step_idx += 1
+        step = self.current_sequence[idx]
         self.log(f"Pas {self.current_step_idx}/{len(self.current_sequence)}: {step.get('name', '')}")
-
-        s0 = step.get("servo0", self.rest_angle)
-        s1 = step.get("servo1", self.rest_angle)
-        s2 = step.get("servo2", self.rest_angle)
-        speed = step.get("speed", 60)
-        pause = step.get("pause", 0)
-        nano_cmd = str(step.get("nano_cmd", "")).strip()
-
-        self.send("M279")
-        self.send(f"M280 P0 S{s0} V{speed}")
-        self.send(f"M280 P1 S{s1} V{speed}")
-        self.send(f"M280 P2 S{s2} V{speed}")
-        self.send("M278")
-
-        if pause and isinstance(pause, (int, float)) and pause > 0:
-            self.send(f"G4 P{int(pause)}")
-
-        if nano_cmd:
-            self.send(nano_cmd)
-
-        self.send("M400")
+        # Only the trailing M400 of the payload answers "ok".
+        self.send_bytes(self.compiled_sequence[idx])
         self.waiting_for_ok = True
 
     def on_serial_line(self, line: str) -> None:
-        if self.playing and self.waiting_for_ok and line.lower().endswith("ok"):
+        if self.playing and self.waiting_for_ok and line.endswith(_OK_SUFFIXES):
             self.waiting_for_ok = False
             self._play_next_step()
 
@@ -353,18 +819,17 @@ class ArmController:
 
     def goto_rest(self) -> None:
         self.log("--- Retour position repos ---")
-        self.send("M279")
-        self.send(f"M280 P0 S{self.rest_angle} V60")
-        self.send(f"M280 P1 S{self.rest_angle} V60")
-        self.send(f"M280 P2 S{self.rest_angle} V60")
-        self.send("M278")
-        self.send("M400")
+        # An empty step is exactly the rest pose: every servo at rest, speed 60.
+        self.send_bytes(compile_step({}, self.rest_angle))
 
 
 # =============================================================================
 # SD manager window
 # =============================================================================
 
+# Lines worth forwarding to the SD window: list markers or "NAME.EXT size".
+_SD_LINE_RE = re.compile(r"file list|\S+\.\S+\s").search
+
 
 class SdManagerWindow(tk.Toplevel):
     def __init__(self, master: tk.Widget, serial_mgr: SerialManager, log_callback: Callable[[str], None], palette: Palette) -> None:
@@ -374,6 +839,10 @@ class SdManagerWindow(tk.Toplevel):
         self.log = log_callback
         self.palette = palette
         self.file_list: List[Dict[str, str]] = []
+        # Entries received between "Begin file list" and "End file list".
+        self._pending: Optional[List[str]] = None
+        # Timer refreshing the upload progress label.
+        self._upload_after_id: Optional[str] = None
         self.configure(bg=self.palette.background)
         DarkTheme(self)  # ensure nested windows inherit styling
         self.protocol("WM_DELETE_WINDOW", self._on_close)
@@ -386,6 +855,12 @@ class SdManagerWindow(tk.Toplevel):
             self.master.sd_window = None  # type: ignore[assignment]
         self.destroy()
 
+    def destroy(self) -> None:
+        if self._upload_after_id is not None:
+            self.after_cancel(self._upload_after_id)
+            self._upload_after_id = None
+        super().destroy()
+
     def _build_ui(self) -> None:
         self.columnconfigure(0, weight=1)
         self.rowconfigure(1, weight=1)
@@ -435,6 +910,9 @@ class SdManagerWindow(tk.Toplevel):
         self.sd_info.insert("end", "Infos SD / logs...\n")
         self.sd_info.configure(state="disabled")
 
+        self.upload_label = ttk.Label(info_frame, text="", style="Muted.TLabel")
+        self.upload_label.grid(row=1, column=0, sticky="w", pady=(6, 0))
+
     def append_info(self, text: str) -> None:
         self.sd_info.configure(state="normal")
         self.sd_info.insert("end", text + "\n")
@@ -450,9 +928,9 @@ class SdManagerWindow(tk.Toplevel):
         self.append_info("M21 envoyé (montage SD)")
 
     def cmd_list(self) -> None:
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.tree.delete(*self.tree.get_children())
         self.file_list.clear()
+        self._pending = None
         self.send("M20")
         self.append_info("M20 envoyé (liste fichiers)")
 
@@ -461,16 +939,50 @@ class SdManagerWindow(tk.Toplevel):
         if not path:
             return
         filename = os.path.basename(path)
-        self.append_info(f"Téléversement de {filename} ...")
-        self.send(f"M28 {filename}")
         try:
-            with open(path, "r", encoding="utf-8") as handle:
-                for line in handle:
-                    self.send(line.rstrip("\r\n"))
+            data = Path(path).read_bytes().replace(b"\r\n", b"\n")
         except Exception as exc:  # pragma: no cover - file interaction
             self.append_info(f"Erreur lecture fichier: {exc}")
+            return
+        if data and not data.endswith(b"\n"):
+            data += b"\n"
+        line_count = data.count(b"\n")
+        ser = self.serial.ser
+        if ser is None:
+            self.append_info("Port série fermé : téléversement annulé.")
+            return
+        self.append_info(f"Téléversement de {filename} ({line_count} lignes) ...")
+        start = self.serial.bytes_queued
+        self.send(f"M28 {filename}")
+        # The firmware stores raw bytes between M28/M29: send the file in one
+        # write and log a summary instead of one console line per G-code line.
+        self.log(f">> [{filename}: {line_count} lignes, {len(data)} octets]")
+        self.serial.send_bytes(data)
         self.send("M29")
-        self.append_info(f"{filename} envoyé (M28/M29). Utiliser M20 pour rafraîchir.")
+        # The writes are only queued: report progress until M29 is out.
+        if self._upload_after_id is not None:
+            self.after_cancel(self._upload_after_id)
+        self._watch_upload(ser, filename, start, self.serial.bytes_queued)
+
+    def _watch_upload(self, ser: object, filename: str, start: int, end: int) -> None:
+        self._upload_after_id = None
+        written = self.serial.bytes_written
+        current = self.serial.ser
+        # A closed port keeps draining; only a reopen or a finished drain
+        # that fell short means the file was cut.
+        if current is not ser and (
+            current is not None or (written < end and not self.serial.is_closing())
+        ):
+            self.upload_label.configure(text="")
+            self.append_info(f"Téléversement de {filename} interrompu : port fermé avant M29.")
+            return
+        if written >= end:
+            self.upload_label.configure(text="")
+            self.append_info(f"{filename} envoyé (M28/M29). Utiliser M20 pour rafraîchir.")
+            return
+        percent = max(0, written - start) * 100 // (end - start)
+        self.upload_label.configure(text=f"Téléversement de {filename} : {percent} %")
+        self._upload_after_id = self.after(200, self._watch_upload, ser, filename, start, end)
 
     def cmd_delete(self) -> None:
         selection = self.tree.selection()
@@ -481,25 +993,93 @@ class SdManagerWindow(tk.Toplevel):
         self.send(f"M30 {filename}")
         self.append_info(f"Demande suppression M30 {filename}")
 
+    def _begin_list(self, line: str) -> None:
+        self.append_info(line)
+        self._pending = []
+
+    def _end_list(self, line: str) -> None:
+        self._flush_pending()
+        self.append_info(line)
+
+    # First character -> (marker, handler): file entries skip the prefix tests.
+    _LIST_MARKERS = {
+        "B": ("Begin file list", _begin_list),
+        "E": ("End file list", _end_list),
+    }
+
     def on_sd_line(self, line: str) -> None:
-        if line.startswith("Begin file list") or line.startswith("End file list"):
-            self.append_info(line)
+        marker = self._LIST_MARKERS.get(line[:1])
+        if marker is not None and line.startswith(marker[0]):
+            marker[1](self, line)
             return
         parts = line.split()
         if len(parts) >= 2:
-            name = parts[0]
-            size = parts[1]
-            self.tree.insert("", "end", values=(name, size))
-            self.file_list.append({"name": name, "size": size})
+            if self._pending is not None:
+                self._pending.append(line)
+                return
+            self._add_file(parts[0], parts[1])
             self.append_info(line)
 
+    def _add_file(self, name: str, size: str) -> None:
+        self.tree.insert("", "end", values=(name, size))
+        self.file_list.append({"name": name, "size": size})
+
+    def _flush_pending(self) -> None:
+        """Insert a whole file listing at once so Tk lays the tree out once."""
+        lines, self._pending = self._pending, None
+        if not lines:
+            return
+        for line in lines:
+            name, size = line.split()[:2]
+            self._add_file(name, size)
+        self.append_info("\n".join(lines))
+
 
 # =============================================================================
 # Main window
 # =============================================================================
 
+_BG_SIZE = (320, 320)
+# Decoded PIL background images keyed by (path, mtime, size), so the PNG is
+# only decoded and resampled again when the file actually changes. The Tk
+# PhotoImage belongs to one interpreter and is built per window.
+_bg_cache: Dict[tuple, object] = {}
+# Pillow < 9.1 exposes the filters on Image itself.
+_BILINEAR = getattr(getattr(Image, "Resampling", Image), "BILINEAR", None)
+
 
 class MainWindow(tk.Tk):
+    _SERVO_FMT = "M280 P{p} S{s} V{v}".format
+
+    # Serial poll period: fast while traffic or playback is active.
+    POLL_FAST_MS = 20
+    POLL_IDLE_MS = 100
+    # Console scrollback kept in the widget; older lines are dropped.
+    MAX_CONSOLE_LINES = 2000
+    # Quiet time after the last servo slider motion before sending.
+    SERVO_DEBOUNCE_MS = 30
+    # Repeated clicks on the same button closer than this are dropped.
+    ACTION_DEBOUNCE_S = 0.03
+    # Button actions run through _run(): name -> (method name, arguments).
+    _ACTIONS: ClassVar[Dict[str, Tuple[str, tuple]]] = {
+        "delta_-10": ("set_delta", (-10,)),
+        "delta_-1": ("set_delta", (-1,)),
+        "delta_+1": ("set_delta", (1,)),
+        "delta_+10": ("set_delta", (10,)),
+        "nano_left": ("send_nano_move", (-1,)),
+        "nano_right": ("send_nano_move", (1,)),
+        "servo0_up": ("jog_servo", (0, 1)),
+        "servo0_down": ("jog_servo", (0, -1)),
+        "servo1_up": ("jog_servo", (1, 1)),
+        "servo1_down": ("jog_servo", (1, -1)),
+        "servo2_up": ("jog_servo", (2, 1)),
+        "servo2_down": ("jog_servo", (2, -1)),
+        "loop_-10": ("change_loop", (-10,)),
+        "loop_-1": ("change_loop", (-1,)),
+        "loop_+1": ("change_loop", (1,)),
+        "loop_+10": ("change_loop", (10,)),
+    }
+
     def __init__(self) -> None:
         super().__init__()
         self.title("Contrôle bras robotique")
@@ -509,11 +1089,29 @@ class MainWindow(tk.Tk):
         self.configure(bg=self.palette.background)
         self.theme = DarkTheme(self, self.palette)
 
-        self.serial_mgr = SerialManager(on_line_callback=self.on_serial_line)
+        self.serial_mgr = SerialManager(
+            on_line_callback=self.on_serial_line,
+            dispatch=self.after_idle,
+            log_callback=self.append_console,
+        )
         self.timeline = TimelineManager()
         self.arm = ArmController(self.serial_mgr, log_callback=self.append_console)
         self.sd_window: Optional[SdManagerWindow] = None
         self.background_image: Optional[ImageTk.PhotoImage] = None  # type: ignore[assignment]
+        # Console messages waiting for the next batched insert into the widget.
+        self._console_buf: Deque[str] = deque(maxlen=10000)
+        self._console_flush_pending = False
+        # Row values currently shown in the timeline tree, indexed like iids.
+        self._tree_snapshot: List[tuple] = []
+        # Descriptor registered with Tk's file handler while a port is open.
+        self._serial_watch_fd = -1
+        # Pending debounced send scheduled by the servo sliders.
+        self._servo_after_id: Optional[str] = None
+        # "/<total>" of the running sequence and the loop text last shown.
+        self._loop_suffix = "/1"
+        self._loop_info_text = ""
+        # Last action run by _run() and when, for the click debounce.
+        self._last_action: Tuple[str, float] = ("", 0.0)
 
         self._build_ui()
         self._setup_serial_ui()
@@ -558,16 +1156,20 @@ class MainWindow(tk.Tk):
         inc_frame.grid(row=0, column=0, sticky="w", padx=6, pady=(0, 8))
         ttk.Label(inc_frame, text="Δ pas (stepper):", style="Muted.TLabel").grid(row=0, column=0, padx=(0, 6))
         self.jog_delta_var = tk.StringVar(value="10")
+        self._jog_delta_raw = "10"
+        self.jog_delta_var.trace_add("write", self._sync_stepper_inputs)
         ttk.Entry(inc_frame, textvariable=self.jog_delta_var, width=6).grid(row=0, column=1, padx=(0, 8))
-        ttk.Button(inc_frame, text="-10", command=lambda: self.set_delta(-10), style="Toggle.TButton").grid(row=0, column=2, padx=2)
-        ttk.Button(inc_frame, text="-1", command=lambda: self.set_delta(-1), style="Toggle.TButton").grid(row=0, column=3, padx=2)
-        ttk.Button(inc_frame, text="+1", command=lambda: self.set_delta(1), style="Toggle.TButton").grid(row=0, column=4, padx=2)
-        ttk.Button(inc_frame, text="+10", command=lambda: self.set_delta(10), style="Toggle.TButton").grid(row=0, column=5, padx=2)
+        ttk.Button(inc_frame, text="-10", command=partial(self._run, "delta_-10"), style="Toggle.TButton").grid(row=0, column=2, padx=2)
+        ttk.Button(inc_frame, text="-1", command=partial(self._run, "delta_-1"), style="Toggle.TButton").grid(row=0, column=3, padx=2)
+        ttk.Button(inc_frame, text="+1", command=partial(self._run, "delta_+1"), style="Toggle.TButton").grid(row=0, column=4, padx=2)
+        ttk.Button(inc_frame, text="+10", command=partial(self._run, "delta_+10"), style="Toggle.TButton").grid(row=0, column=5, padx=2)
 
         speed_frame = ttk.Frame(control_section, style="Card.TFrame")
         speed_frame.grid(row=1, column=0, sticky="ew", padx=6, pady=(0, 8))
         ttk.Label(speed_frame, text="Vitesse moteur pas à pas", style="Muted.TLabel").grid(row=0, column=0, sticky="w")
         self.stepper_speed_var = tk.StringVar(value="200")
+        self._stepper_speed_raw = "200"
+        self.stepper_speed_var.trace_add("write", self._sync_stepper_inputs)
         ttk.Entry(speed_frame, textvariable=self.stepper_speed_var, width=8).grid(row=0, column=1, padx=(8, 0))
 
         servo_frame = ttk.LabelFrame(control_section, text="Servos", style="Card.TLabelframe")
@@ -580,8 +1182,8 @@ class MainWindow(tk.Tk):
             "style": "Toggle.TButton",
         }
 
-        ttk.Button(servo_frame, text="◀", command=lambda: self.send_nano_move(-1), **button_opts).grid(row=1, column=0, rowspan=3, padx=4, pady=4, sticky="ns")
-        ttk.Button(servo_frame, text="▶", command=lambda: self.send_nano_move(+1), **button_opts).grid(row=1, column=7, rowspan=3, padx=4, pady=4, sticky="ns")
+        ttk.Button(servo_frame, text="◀", command=partial(self._run, "nano_left"), **button_opts).grid(row=1, column=0, rowspan=3, padx=4, pady=4, sticky="ns")
+        ttk.Button(servo_frame, text="▶", command=partial(self._run, "nano_right"), **button_opts).grid(row=1, column=7, rowspan=3, padx=4, pady=4, sticky="ns")
 
         ttk.Label(servo_frame, text="Δ°", style="Muted.TLabel").grid(row=0, column=3, padx=4)
         ttk.Label(servo_frame, text="Vitesse", style="Muted.TLabel").grid(row=0, column=4, padx=4)
@@ -598,6 +1200,7 @@ class MainWindow(tk.Tk):
                 orient="horizontal",
                 variable=self.servo_vars[idx],
                 style="Horizontal.TScale",
+                command=self._schedule_servo_send,
             )
             scale.grid(row=idx + 1, column=2, sticky="ew", padx=6)
             ttk.Entry(servo_frame, textvariable=self.servo_step_vars[idx], width=5).grid(row=idx + 1, column=3, padx=4)
@@ -605,13 +1208,13 @@ class MainWindow(tk.Tk):
             ttk.Button(
                 servo_frame,
                 text="▲",
-                command=lambda i=idx: self.jog_servo(i, +1),
+                command=partial(self._run, f"servo{idx}_up"),
                 **button_opts,
             ).grid(row=idx + 1, column=5, padx=2, pady=2)
             ttk.Button(
                 servo_frame,
                 text="▼",
-                command=lambda i=idx: self.jog_servo(i, -1),
+                command=partial(self._run, f"servo{idx}_down"),
                 **button_opts,
             ).grid(row=idx + 1, column=6, padx=2, pady=2)
 
@@ -637,6 +1240,13 @@ class MainWindow(tk.Tk):
         parent.columnconfigure(0, weight=1)
 
         ttk.Label(parent, text="Console", style="Heading.TLabel").grid(row=0, column=0, sticky="w")
+        self.verbose_var = tk.BooleanVar(value=self.arm.verbose)
+        ttk.Checkbutton(
+            parent,
+            text="Afficher les commandes envoyées",
+            variable=self.verbose_var,
+            command=self._on_verbose_toggle,
+        ).grid(row=0, column=0, sticky="e")
 
         self.console = tk.Text(
             parent,
@@ -645,6 +1255,8 @@ class MainWindow(tk.Tk):
             fg=self.palette.text,
             insertbackground=self.palette.text,
             relief="flat",
+            undo=False,
+            maxundo=0,
         )
         self.console.grid(row=1, column=0, sticky="nsew", pady=(6, 10))
         self.console.insert("end", "Console prête.\n")
@@ -716,14 +1328,16 @@ class MainWindow(tk.Tk):
         loop_frame.grid(row=0, column=4, sticky="e")
         ttk.Label(loop_frame, text="Boucles:", style="Muted.TLabel").grid(row=0, column=0, padx=(0, 6))
         self.loop_var = tk.IntVar(value=1)
+        # Python-side copy; change_loop() is the only writer of loop_var.
+        self._loop_val = 1
         ttk.Label(loop_frame, textvariable=self.loop_var, style="Heading.TLabel", width=4).grid(row=0, column=1)
-        ttk.Button(loop_frame, text="-10", command=lambda: self.change_loop(-10), style="Toggle.TButton").grid(row=0, column=2, padx=2)
-        ttk.Button(loop_frame, text="-1", command=lambda: self.change_loop(-1), style="Toggle.TButton").grid(row=0, column=3, padx=2)
-        ttk.Button(loop_frame, text="+1", command=lambda: self.change_loop(+1), style="Toggle.TButton").grid(row=0, column=4, padx=2)
-        ttk.Button(loop_frame, text="+10", command=lambda: self.change_loop(+10), style="Toggle.TButton").grid(row=0, column=5, padx=2)
+        ttk.Button(loop_frame, text="-10", command=partial(self._run, "loop_-10"), style="Toggle.TButton").grid(row=0, column=2, padx=2)
+        ttk.Button(loop_frame, text="-1", command=partial(self._run, "loop_-1"), style="Toggle.TButton").grid(row=0, column=3, padx=2)
+        ttk.Button(loop_frame, text="+1", command=partial(self._run, "loop_+1"), style="Toggle.TButton").grid(row=0, column=4, padx=2)
+        ttk.Button(loop_frame, text="+10", command=partial(self._run, "loop_+10"), style="Toggle.TButton").grid(row=0, column=5, padx=2)
 
-        self.loop_info = tk.StringVar(value="Boucles prévues: 1")
-        ttk.Label(bottom, textvariable=self.loop_info, style="Muted.TLabel").grid(row=0, column=5, sticky="e")
+        self.loop_info_label = ttk.Label(bottom, text="Boucles prévues: 1", style="Muted.TLabel")
+        self.loop_info_label.grid(row=0, column=5, sticky="e")
 
         self.status = ttk.Label(self, text="Prêt", style="Status.TLabel", anchor="w")
         self.status.pack(fill=tk.X, padx=12, pady=(0, 12))
@@ -739,19 +1353,18 @@ class MainWindow(tk.Tk):
     # ------------------------------------------------------- timeline ops ---
 
     def refresh_timeline_list(self) -> None:
-        for item in self.timeline_tree.get_children():
-            self.timeline_tree.delete(item)
-        for idx, step in enumerate(self.timeline.steps):
-            name = step.get("name", f"Step {idx + 1}")
-            values = (
-                name,
-                step.get("servo0", 90),
-                step.get("servo1", 90),
-                step.get("servo2", 90),
-                step.get("pause", 0),
-                step.get("nano_cmd", ""),
-            )
-            self.timeline_tree.insert("", "end", iid=str(idx), values=values)
+        """Update only the tree rows that differ from what is displayed."""
+        rows = self.timeline.rows()
+        shown = self._tree_snapshot
+        tree = self.timeline_tree
+        for idx in range(min(len(shown), len(rows))):
+            if shown[idx] != rows[idx]:
+                tree.item(str(idx), values=rows[idx])
+        if len(shown) > len(rows):
+            tree.delete(*[str(idx) for idx in range(len(rows), len(shown))])
+        for idx in range(len(shown), len(rows)):
+            tree.insert("", "end", iid=str(idx), values=rows[idx])
+        self._tree_snapshot = rows
 
     def add_step_dialog(self) -> None:
         dialog = tk.Toplevel(self)
@@ -760,14 +1373,14 @@ class MainWindow(tk.Tk):
         DarkTheme(dialog, self.palette)
         dialog.grab_set()
 
-        fields = {
-            "name": tk.StringVar(value=f"Step {len(self.timeline.steps) + 1}"),
-            "servo0": tk.IntVar(value=self.servo_vars[0].get()),
-            "servo1": tk.IntVar(value=self.servo_vars[1].get()),
-            "servo2": tk.IntVar(value=self.servo_vars[2].get()),
-            "speed": tk.IntVar(value=self.speed_var.get()),
-            "pause": tk.IntVar(value=500),
-            "nano": tk.StringVar(value=""),
+        defaults = {
+            "name": f"Step {len(self.timeline.steps) + 1}",
+            "servo0": self.servo_vars[0].get(),
+            "servo1": self.servo_vars[1].get(),
+            "servo2": self.servo_vars[2].get(),
+            "speed": self.speed_var.get(),
+            "pause": 500,
+            "nano": "",
         }
 
         form = ttk.Frame(dialog, padding=20, style="Card.TFrame")
@@ -775,7 +1388,7 @@ class MainWindow(tk.Tk):
         dialog.columnconfigure(0, weight=1)
         dialog.rowconfigure(0, weight=1)
 
-        entries = [
+        labels = [
             ("Nom", "name"),
             ("Servo 0", "servo0"),
             ("Servo 1", "servo1"),
@@ -784,21 +1397,32 @@ class MainWindow(tk.Tk):
             ("Pause (ms)", "pause"),
             ("Commande Nano", "nano"),
         ]
-        for row, (label, key) in enumerate(entries):
+        entries: Dict[str, ttk.Entry] = {}
+        for row, (label, key) in enumerate(labels):
             ttk.Label(form, text=label, style="Muted.TLabel").grid(row=row, column=0, sticky="e", padx=(0, 12), pady=4)
-            ttk.Entry(form, textvariable=fields[key]).grid(row=row, column=1, sticky="ew", pady=4)
+            entry = ttk.Entry(form)
+            entry.insert(0, str(defaults[key]))
+            entry.grid(row=row, column=1, sticky="ew", pady=4)
+            entries[key] = entry
         form.columnconfigure(1, weight=1)
 
+        def int_or(key: str) -> int:
+            return int(entries[key].get() or defaults[key])
+
         def on_ok() -> None:
-            step = {
-                "name": fields["name"].get(),
-                "servo0": fields["servo0"].get(),
-                "servo1": fields["servo1"].get(),
-                "servo2": fields["servo2"].get(),
-                "speed": fields["speed"].get(),
-                "pause": fields["pause"].get(),
-                "nano_cmd": fields["nano"].get().strip(),
-            }
+            try:
+                step = {
+                    "name": entries["name"].get(),
+                    "servo0": int_or("servo0"),
+                    "servo1": int_or("servo1"),
+                    "servo2": int_or("servo2"),
+                    "speed": int_or("speed"),
+                    "pause": int_or("pause"),
+                    "nano_cmd": entries["nano"].get().strip(),
+                }
+            except ValueError:
+                messagebox.showerror("Erreur", "Valeurs numériques invalides", parent=dialog)
+                return
             self.timeline.add_step(step)
             self.refresh_timeline_list()
             dialog.destroy()
@@ -815,9 +1439,9 @@ class MainWindow(tk.Tk):
         self.timeline_tree.selection_set(iid)
         index = int(iid)
         menu = tk.Menu(self, tearoff=0)
-        menu.add_command(label="Répéter ce mouvement", command=lambda: self.repeat_step(index))
-        menu.add_command(label="Revenir à cette étape", command=lambda: self.goto_step(index))
-        menu.add_command(label="Supprimer cette étape", command=lambda: self.delete_step(index))
+        menu.add_command(label="Répéter ce mouvement", command=partial(self.repeat_step, index))
+        menu.add_command(label="Revenir à cette étape", command=partial(self.goto_step, index))
+        menu.add_command(label="Supprimer cette étape", command=partial(self.delete_step, index))
         menu.tk_popup(event.x_root, event.y_root)
 
     def repeat_step(self, idx: int) -> None:
@@ -845,8 +1469,17 @@ class MainWindow(tk.Tk):
             self.append_console("Aucune étape dans la timeline")
             self.status.configure(text="Séquence vide")
             return
-        loops = max(1, self.loop_var.get())
-        self.arm.play_sequence(self.timeline.steps, loops=loops, on_finished=self.on_sequence_finished)
+        loops = max(1, self._loop_val)
+        self._loop_suffix = f"/{loops}"
+        if self._servo_after_id is not None:
+            self.after_cancel(self._servo_after_id)
+            self._servo_after_id = None
+        self.arm.play_sequence(
+            self.timeline.steps,
+            loops=loops,
+            on_finished=self.on_sequence_finished,
+            compiled=self.timeline.compile(self.arm.rest_angle),
+        )
         self.update_loop_info()
         self.status.configure(text=f"Lecture séquence ({loops} boucle(s))")
 
@@ -866,16 +1499,20 @@ class MainWindow(tk.Tk):
         self.status.configure(text="Timeline effacée")
 
     def change_loop(self, delta: int) -> None:
-        value = max(1, self.loop_var.get() + delta)
+        value = max(1, self._loop_val + delta)
+        self._loop_val = value
         self.loop_var.set(value)
         self.update_loop_info()
 
     def update_loop_info(self) -> None:
         if self.arm.playing:
             done = self.arm.loop_total - self.arm.loop_remaining
-            self.loop_info.set(f"Boucle: {done}/{self.arm.loop_total}")
+            text = "Boucle: " + str(done) + self._loop_suffix
         else:
-            self.loop_info.set(f"Boucles prévues: {self.loop_var.get()}")
+            text = f"Boucles prévues: {self._loop_val}"
+        if text != self._loop_info_text:
+            self._loop_info_text = text
+            self.loop_info_label.configure(text=text)
 
     # -------------------------------------------------- persistence ops ---
 
@@ -911,11 +1548,17 @@ class MainWindow(tk.Tk):
     # ---------------------------------------------------------- SD window ---
 
     def open_sd_window(self) -> None:
-        if self.sd_window is None or not tk.Toplevel.winfo_exists(self.sd_window):
+        if self.sd_window is None:
             self.sd_window = SdManagerWindow(self, self.serial_mgr, self.append_console, self.palette)
+            self.sd_window.bind("<Destroy>", self._on_sd_destroy, add="+")
         else:
             self.sd_window.lift()
 
+    def _on_sd_destroy(self, event: tk.Event) -> None:
+        # Children of the Toplevel report their own <Destroy> here too.
+        if event.widget is self.sd_window:
+            self.sd_window = None
+
     # --------------------------------------------------- commands helpers ---
 
     def send_current_servo_pos(self) -> None:
@@ -927,12 +1570,38 @@ class MainWindow(tk.Tk):
             self._get_servo_speed(1),
             self._get_servo_speed(2),
         ]
-        self.arm.send("M279")
-        self.arm.send(f"M280 P0 S{s0} V{speeds[0]}")
-        self.arm.send(f"M280 P1 S{s1} V{speeds[1]}")
-        self.arm.send(f"M280 P2 S{s2} V{speeds[2]}")
-        self.arm.send("M278")
-        self.arm.send("M400")
+        self.arm.send_many(
+            [
+                "M279",
+                self._SERVO_FMT(p=0, s=s0, v=speeds[0]),
+                self._SERVO_FMT(p=1, s=s1, v=speeds[1]),
+                self._SERVO_FMT(p=2, s=s2, v=speeds[2]),
+                "M278",
+                "M400",
+            ]
+        )
+
+    def _run(self, action: str) -> None:
+        """Run a button action, ignoring an immediate repeat of the same one."""
+        now = time.monotonic()
+        last_action, last_time = self._last_action
+        if action == last_action and now - last_time < self.ACTION_DEBOUNCE_S:
+            return
+        self._last_action = (action, now)
+        name, args = self._ACTIONS[action]
+        getattr(self, name)(*args)
+
+    def _schedule_servo_send(self, _value: str = "") -> None:
+        """Send the slider position once the drag pauses."""
+        if self._servo_after_id is not None:
+            self.after_cancel(self._servo_after_id)
+        self._servo_after_id = self.after(self.SERVO_DEBOUNCE_MS, self._send_servo_debounced)
+
+    def _send_servo_debounced(self) -> None:
+        self._servo_after_id = None
+        # An extra M400 "ok" would be taken as the ack of a playback step.
+        if self.serial_mgr.ser and not self.arm.playing:
+            self.send_current_servo_pos()
 
     def set_delta(self, value: int) -> None:
         self.jog_delta_var.set(str(value))
@@ -955,9 +1624,14 @@ class MainWindow(tk.Tk):
     def _update_servo_speed_label(self, *_: object) -> None:
         self.servo_speed_value.set(f"{self.speed_var.get()}°/s")
 
+    def _sync_stepper_inputs(self, *_: object) -> None:
+        """Mirror the stepper entries so jogging does not read them from Tcl."""
+        self._jog_delta_raw = self.jog_delta_var.get()
+        self._stepper_speed_raw = self.stepper_speed_var.get()
+
     def _get_stepper_speed(self) -> int:
         default_speed = 200
-        raw_value = self.stepper_speed_var.get().strip()
+        raw_value = self._stepper_speed_raw.strip()
         invalid = False
         try:
             speed = int(raw_value)
@@ -974,7 +1648,7 @@ class MainWindow(tk.Tk):
 
     def _get_stepper_delta(self) -> int:
         default_delta = 10
-        raw_value = self.jog_delta_var.get().strip()
+        raw_value = self._jog_delta_raw.strip()
         invalid = False
         try:
             delta = int(raw_value)
@@ -1026,10 +1700,34 @@ class MainWindow(tk.Tk):
     # ----------------------------------------------------------- console ---
 
     def append_console(self, text: str) -> None:
+        """Queue a console line; the widget is updated at most every 100 ms."""
+        self._console_buf.append(text)
+        if not self._console_flush_pending:
+            self._console_flush_pending = True
+            self.after(100, self._flush_console)
+
+    def _flush_console(self) -> None:
+        self._console_flush_pending = False
+        if not self._console_buf:
+            return
+        text = "\n".join(self._console_buf) + "\n"
+        self._console_buf.clear()
+        # Follow new output only if the user has not scrolled back.
+        at_bottom = self.console.yview()[1] >= 0.999
         self.console.configure(state="normal")
-        self.console.insert("end", text + "\n")
-        self.console.see("end")
+        self.console.insert("end", text)
+        # The text always ends with a newline, so "end-1c" sits one line past
+        # the last message.
+        lines = int(self.console.index("end-1c").split(".")[0]) - 1
+        excess = lines - self.MAX_CONSOLE_LINES
+        if excess > 0:
+            self.console.delete("1.0", f"{excess + 1}.0")
         self.console.configure(state="disabled")
+        if at_bottom:
+            self.console.yview_moveto(1.0)
+
+    def _on_verbose_toggle(self) -> None:
+        self.arm.verbose = self.verbose_var.get()
 
     def send_console_line(self) -> None:
         line = self.console_entry.get().strip()
@@ -1044,10 +1742,13 @@ class MainWindow(tk.Tk):
     # ----------------------------------------------------------- serial ---
 
     def _on_close(self) -> None:
-        if self.sd_window and tk.Toplevel.winfo_exists(self.sd_window):
+        if self.sd_window is not None:
             self.sd_window.destroy()
-            self.sd_window = None
+        self._unwatch_serial()
+        # Hide the window while the port finishes writing, e.g. the rest pose.
+        self.withdraw()
         self.serial_mgr.close()
+        self.serial_mgr.wait_closed()
         self.destroy()
 
     def choose_serial_port(self) -> None:
@@ -1064,12 +1765,26 @@ class MainWindow(tk.Tk):
         selection = tk.StringVar(value=ports[0])
         option_frame = ttk.Frame(dialog, padding=20, style="Card.TFrame")
         option_frame.grid(row=0, column=0, sticky="nsew")
-        for port in ports:
-            ttk.Radiobutton(option_frame, text=port, variable=selection, value=port).pack(anchor="w", pady=4)
+
+        def fill_ports(port_list: List[str]) -> None:
+            for child in option_frame.winfo_children():
+                child.destroy()
+            for port in port_list:
+                ttk.Radiobutton(option_frame, text=port, variable=selection, value=port).pack(anchor="w", pady=4)
+            if port_list and selection.get() not in port_list:
+                selection.set(port_list[0])
+
+        def on_refresh() -> None:
+            self.serial_mgr.invalidate_ports()
+            fill_ports(self.serial_mgr.list_ports())
+
+        fill_ports(ports)
 
         def on_ok() -> None:
             try:
+                self._unwatch_serial()
                 self.serial_mgr.open(selection.get())
+                self._watch_serial()
                 self.append_console(f"Port série ouvert: {selection.get()}")
                 self.status.configure(text=f"Connecté à {selection.get()}")
                 dialog.destroy()
@@ -1079,22 +1794,46 @@ class MainWindow(tk.Tk):
         action_frame = ttk.Frame(dialog, padding=(20, 0, 20, 20), style="Card.TFrame")
         action_frame.grid(row=1, column=0, sticky="ew")
         action_frame.columnconfigure(0, weight=1)
-        ttk.Button(action_frame, text="Valider", command=on_ok, style="Accent.TButton").grid(row=0, column=0, sticky="ew")
+        action_frame.columnconfigure(1, weight=1)
+        ttk.Button(action_frame, text="Rafraîchir", command=on_refresh).grid(row=0, column=0, sticky="ew", padx=(0, 6))
+        ttk.Button(action_frame, text="Valider", command=on_ok, style="Accent.TButton").grid(row=0, column=1, sticky="ew")
 
     def close_serial(self) -> None:
+        self._unwatch_serial()
         self.serial_mgr.close()
         self.append_console("Port série fermé.")
         self.status.configure(text="Port série fermé")
 
-    def _poll_serial(self) -> None:
+    def _watch_serial(self) -> None:
+        """Wake the Tk loop as soon as serial lines are queued (POSIX only)."""
+        fd = self.serial_mgr.notify_fileno()
+        if fd < 0 or not hasattr(self.tk, "createfilehandler"):
+            return
+        self.tk.createfilehandler(fd, tk.READABLE, self._on_serial_notify)
+        self._serial_watch_fd = fd
+
+    def _unwatch_serial(self) -> None:
+        if self._serial_watch_fd >= 0:
+            self.tk.deletefilehandler(self._serial_watch_fd)
+            self._serial_watch_fd = -1
+
+    def _on_serial_notify(self, _fd: int, _mask: int) -> None:
         self.serial_mgr.poll()
-        self.after(50, self._poll_serial)
+
+    def _poll_serial(self) -> None:
+        busy = self.serial_mgr.poll()
+        # With a file handler the timer is only a safety net.
+        if self._serial_watch_fd < 0 and (busy or self.arm.playing):
+            delay = self.POLL_FAST_MS
+        else:
+            delay = self.POLL_IDLE_MS
+        self.after(delay, self._poll_serial)
 
     def on_serial_line(self, line: str) -> None:
         self.append_console(line)
         self.arm.on_serial_line(line)
-        if self.sd_window and tk.Toplevel.winfo_exists(self.sd_window):
-            if ("file list" in line) or ("." in line and " " in line):
+        if self.sd_window is not None:
+            if _SD_LINE_RE(line):
                 self.sd_window.on_sd_line(line)
 
     # ----------------------------------------------------- background img ---
@@ -1103,12 +1842,22 @@ class MainWindow(tk.Tk):
         if not Image:
             return
         path = "background.png"
-        if not os.path.exists(path):
+        try:
+            key = (path, os.path.getmtime(path), _BG_SIZE)
+        except OSError:
             return
         try:
-            img = Image.open(path)
-            img = img.resize((320, 320))
-            self.background_image = ImageTk.PhotoImage(img)
+            thumb = _bg_cache.get(key)
+            if thumb is None:
+                with Image.open(path) as img:
+                    # Let JPEG decode at reduced scale; bilinear is plenty
+                    # for a fixed-size decoration.
+                    img.draft("RGB", _BG_SIZE)
+                    img.thumbnail(_BG_SIZE, _BILINEAR)
+                    thumb = img.copy()
+                _bg_cache.clear()
+                _bg_cache[key] = thumb
+            self.background_image = ImageTk.PhotoImage(thumb, master=self)  # type: ignore[assignment]
             self.background_label.configure(image=self.background_image)
         except Exception:
             self.background_image = None
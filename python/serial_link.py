@@ -1,19 +1,100 @@
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
 import serial
 
 class SerialLink:
     """Simple wrapper for pyserial to communicate with the robot arm."""
+
+    # Inside a batch, flush early once this many bytes are pending.
+    MAX_BATCH_BYTES = 4096
+
     def __init__(self, port: str, baudrate: int = 115200) -> None:
         self.port = port
         self.baudrate = baudrate
-        self.ser = serial.Serial(port, baudrate=baudrate, timeout=1)
+        # Reads never block; writes happen on the writer thread.
+        self.ser = serial.Serial(port, baudrate=baudrate, timeout=0)
+        self._tx_buf = bytearray()
+        self._batch_depth = 0
+        # Payloads handed to the writer thread; None asks it to stop.
+        self._tx_q: "queue.Queue[Optional[bytes]]" = queue.Queue()
+        # Set when a write fails; re-raised to the caller by the next call.
+        self._tx_error: Optional[BaseException] = None
+        self._tx_thread = threading.Thread(target=self._tx_loop, name="serial-tx", daemon=True)
+        self._tx_thread.start()
 
     def send_command(self, command: str) -> None:
-        """Send a single command string terminated with newline."""
+        """Send a single command string terminated with newline.
+
+        G-code is plain ASCII; anything else is sent as UTF-8.
+        """
         if not command:
             return
-        self.ser.write((command + "\n").encode("utf-8"))
+        self._check_tx_error()
+        try:
+            self._tx_buf.extend(command.encode("ascii"))
+        except UnicodeEncodeError:
+            self._tx_buf.extend(command.encode("utf-8"))
+        self._tx_buf.append(0x0A)
+        if not self._batch_depth or len(self._tx_buf) >= self.MAX_BATCH_BYTES:
+            self.flush()
+
+    def read_available(self) -> bytes:
+        """Return whatever has been received so far, possibly nothing."""
+        return self.ser.read(self.ser.in_waiting or 1)
+
+    def flush(self) -> None:
+        """Hand every buffered command to the writer thread in one piece."""
+        self._check_tx_error()
+        if self._tx_buf:
+            self._tx_q.put(bytes(self._tx_buf))
+            self._tx_buf.clear()
+
+    def _tx_loop(self) -> None:
+        """Write queued payloads, joining whatever piled up into one write."""
+        q = self._tx_q
+        while True:
+            drain = [q.get()]
+            while True:
+                try:
+                    drain.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in drain
+            data = b"".join(item for item in drain if item is not None)
+            if data:
+                try:
+                    self.ser.write(data)
+                except Exception as exc:
+                    self._tx_error = exc
+                    return
+            if stop:
+                return
+
+    def _check_tx_error(self) -> None:
+        if self._tx_error is not None:
+            raise self._tx_error
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group the commands sent inside the block into one write."""
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.flush()
 
     def close(self) -> None:
         """Close the serial connection."""
         if self.ser.is_open:
-            self.ser.close()
+            try:
+                self.flush()
+                self._tx_q.put(None)
+                self._tx_thread.join()
+            finally:
+                self.ser.close()
+            self._check_tx_error()